@@ -10,7 +10,7 @@ matplotlib.use('Agg')  # Non-interactive backend
 import matplotlib.pyplot as plt
 from textblob import TextBlob
 from wordcloud import WordCloud
-from models import Source, AnalysisResult
+from models import Source, AnalysisResult, PreparedCorpus
 from config import CHARTS_DIR
 from logger_setup import log
 
@@ -36,12 +36,13 @@ class TextAnalyzer:
         }
         log.info("TextAnalyzer initialized")
     
-    def analyze(self, sources: List[Source], topic: str) -> AnalysisResult:
+    def analyze(self, sources: List[Source], topic: str,
+                corpus: PreparedCorpus = None) -> AnalysisResult:
         """Perform comprehensive text analysis on sources."""
         log.info(f"Analyzing {len(sources)} sources")
         
-        # Combine all content
-        combined = " ".join([s.content for s in sources])
+        # Combine all content (reuse the prepared join when given)
+        combined = corpus.joined if corpus is not None else " ".join(s.content for s in sources)
         
         # Basic stats
         words = re.findall(r'\b\w+\b', combined.lower())
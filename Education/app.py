@@ -3,16 +3,25 @@ Streamlit UI for Multi-Agent Research Assistant using Agno.
 Agno (formerly Phidata) - Lightweight multi-agent framework.
 """
 import streamlit as st
+from collections import deque
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
+from queue import Queue, Empty
 import time
 import os
 import sys
+import threading
 
 # Ensure the Education package folder is discoverable for local imports
 # when this file is run via `streamlit run` from various working directories.
 sys.path.insert(0, os.path.dirname(__file__))
 
+from config import (
+    STATUS_POLL_INTERVAL, MAX_LOG_LINES_IN_MEMORY, MAX_LOG_LINES_IN_DOM, LOG_PANEL_HEIGHT,
+    CHARTS_DIR
+)
+
 # Page config
 st.set_page_config(
     page_title="Multi-Agent Research Assistant (Agno)",
@@ -21,8 +30,9 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS
-st.markdown("""
+# Custom CSS. Streamlit drops any element a rerun doesn't re-emit, so this
+# is sent on every run; it is a constant so no work goes into rebuilding it.
+_CSS = """
 <style>
     .stApp {
         background: linear-gradient(135deg, #1a1a2e 0%, #16213e 100%);
@@ -30,42 +40,6 @@ st.markdown("""
     
     h1, h2, h3 { color: #e94560 !important; }
     
-    .status-card {
-        background: rgba(255,255,255,0.05);
-        border-radius: 12px;
-        padding: 20px;
-        margin: 10px 0;
-        border-left: 4px solid #e94560;
-    }
-    
-    .phase-box {
-        background: rgba(255,255,255,0.03);
-        border-radius: 8px;
-        padding: 15px;
-        margin: 8px 0;
-        border-left: 3px solid #3498db;
-    }
-    
-    .success-box {
-        background: rgba(40, 167, 69, 0.1);
-        border-left: 3px solid #28a745;
-    }
-    
-    .error-box {
-        background: rgba(220, 53, 69, 0.1);
-        border-left: 3px solid #dc3545;
-    }
-    
-    .log-entry {
-        font-family: 'Monaco', monospace;
-        font-size: 0.85em;
-        padding: 8px 12px;
-        margin: 4px 0;
-        border-radius: 6px;
-        background: rgba(0,0,0,0.2);
-        border-left: 3px solid #ffc107;
-    }
-    
     .agent-badge {
         display: inline-block;
         padding: 4px 12px;
@@ -82,7 +56,58 @@ st.markdown("""
     #MainMenu {visibility: hidden;}
     footer {visibility: hidden;}
 </style>
-""", unsafe_allow_html=True)
+"""
+st.markdown(_CSS, unsafe_allow_html=True)
+
+
+def new_status_log() -> deque:
+    """Create an empty, size-bounded status log."""
+    return deque(maxlen=MAX_LOG_LINES_IN_MEMORY)
+
+
+def format_status(status: dict) -> str:
+    """Pre-render a status update as plain markdown once, when it is received."""
+    phase = status.get('phase', 'UNKNOWN')
+    message = status.get('message', '')
+    ts_str = status.get('ts_str') or status.get('timestamp', datetime.now()).strftime('%H:%M:%S')
+    
+    # Determine styling
+    if phase in ['EXECUTION_COMPLETE', 'REPORT_SAVED']:
+        color = 'green'
+        icon = '✅'
+    elif phase == 'ERROR':
+        color = 'red'
+        icon = '❌'
+    else:
+        color = 'blue'
+        icon = '🔄'
+    
+    return f"{icon} :{color}[**{phase}**] · :gray[{ts_str}]  \n{message}"
+
+
+def flush_status_queue():
+    """Move every status update queued since the last flush into the log."""
+    queue = st.session_state.status_queue
+    status_log = st.session_state.status_log
+    while True:
+        try:
+            status_log.append(queue.get_nowait())
+        except Empty:
+            break
+
+
+def _get_orchestrator():
+    """
+    Return this session's orchestrator, building it on first use.
+
+    It holds per-run state, so it lives in session state; the Groq models
+    and HTTP client it uses are already shared process-wide by planner_agent.
+    The status callback is a fresh closure on every run; callers attach it.
+    """
+    if st.session_state.orchestrator is None:
+        from orchestrator import ResearchOrchestrator
+        st.session_state.orchestrator = ResearchOrchestrator()
+    return st.session_state.orchestrator
 
 
 def init_session_state():
@@ -90,11 +115,19 @@ def init_session_state():
     if 'orchestrator' not in st.session_state:
         st.session_state.orchestrator = None
     if 'status_log' not in st.session_state:
-        st.session_state.status_log = []
+        st.session_state.status_log = new_status_log()
+    if 'log_window' not in st.session_state:
+        st.session_state.log_window = None
+    if 'status_queue' not in st.session_state:
+        st.session_state.status_queue = Queue()
     if 'result' not in st.session_state:
         st.session_state.result = None
     if 'is_running' not in st.session_state:
         st.session_state.is_running = False
+    if 'job' not in st.session_state:
+        st.session_state.job = None
+    if 'report_generation' not in st.session_state:
+        st.session_state.report_generation = 0
 
 
 def render_header():
@@ -122,6 +155,7 @@ def render_sidebar():
         # Topic input
         topic = st.text_area(
             "📝 Research Topic",
+            key="topic",
             placeholder="Enter your research topic...\n\nExamples:\n- Sentiment analysis applications\n- Quantum computing advances\n- Climate change mitigation strategies",
             height=120
         )
@@ -144,7 +178,8 @@ def render_sidebar():
                 "🚀 Start Research",
                 use_container_width=True,
                 disabled=st.session_state.is_running or not topic,
-                type="primary"
+                type="primary",
+                on_click=start_research
             )
         
         with col2:
@@ -173,42 +208,75 @@ def render_sidebar():
 - `analyze_text_statistics`: Text analysis
 - `analyze_sentiment`: Sentiment detection
 - `create_visualization`: Chart generation
+- `run_tools`: Batch several tool calls in one turn
         """)
         
-        return topic, start_btn, clear_btn
+        return clear_btn
 
 
-def render_status_log(status_log):
-    """Render status updates."""
+def current_log_window(total: int) -> tuple:
+    """
+    Return the (start, end) slice of the status log to render.
+
+    A log_window of None means the view follows the tail, so new entries
+    extend it; paging back to older entries pins the window in place.
+    """
+    window = st.session_state.log_window
+    if window is None:
+        return max(0, total - MAX_LOG_LINES_IN_DOM), total
+    start, end = window
+    return min(start, total), min(end, total)
+
+
+def _status_log_panel():
+    """Render status updates straight from session state."""
     st.markdown("### 📊 Research Progress")
     
-    if not status_log:
-        st.info("Waiting to start research...")
+    # The background job finished: one full rerun shows the result and is
+    # the only way to stop this fragment's run_every polling
+    if collect_finished_job():
+        st.rerun()
+    
+    flush_status_queue()
+    status_log = st.session_state.status_log
+    if not st.session_state.is_running:
+        if not status_log:
+            st.info("Waiting to start research...")
+            return
+        _status_log_window(status_log)
         return
     
-    for status in status_log:
-        phase = status.get('phase', 'UNKNOWN')
-        message = status.get('message', '')
-        timestamp = status.get('timestamp', datetime.now())
-        
-        # Determine styling
-        if phase in ['EXECUTION_COMPLETE', 'REPORT_SAVED']:
-            box_class = 'success-box'
-            icon = '✅'
-        elif phase == 'ERROR':
-            box_class = 'error-box'
-            icon = '❌'
-        else:
-            box_class = ''
-            icon = '🔄'
-        
-        st.markdown(f"""
-        <div class="phase-box {box_class}">
-            <strong>{icon} {phase}</strong><br>
-            <small>{timestamp.strftime('%H:%M:%S')}</small><br>
-            {message}
-        </div>
-        """, unsafe_allow_html=True)
+    with st.status("🤖 Agents are working...", expanded=True):
+        _status_log_window(status_log)
+
+
+def _status_log_window(status_log: deque):
+    """Render the current window of the status log with paging controls."""
+    # Only a window of entries goes to the page; older ones are paged in
+    start, end = current_log_window(len(status_log))
+    col_older, col_latest = st.columns(2)
+    if start > 0 and col_older.button("↑ older", key="log_older"):
+        start = max(0, start - MAX_LOG_LINES_IN_DOM)
+        end = min(len(status_log), start + MAX_LOG_LINES_IN_DOM)
+        st.session_state.log_window = (start, end)
+    if st.session_state.log_window is not None and col_latest.button("↓ latest", key="log_latest"):
+        st.session_state.log_window = None
+        start, end = current_log_window(len(status_log))
+    
+    entries = islice(status_log, start, end)
+    with st.container(height=LOG_PANEL_HEIGHT, border=True):
+        st.markdown("\n\n".join(entry['markdown'] for entry in entries))
+
+
+def render_status_log():
+    """
+    Render the progress panel as a fragment.
+
+    While agents are running the fragment polls session state on its own
+    timer, so only this panel reruns instead of the whole script.
+    """
+    run_every = STATUS_POLL_INTERVAL if st.session_state.is_running else None
+    st.fragment(_status_log_panel, run_every=run_every)()
 
 
 def render_research_plan(plan: str):
@@ -218,8 +286,20 @@ def render_research_plan(plan: str):
         st.markdown(plan)
 
 
-def render_final_report(report: str, report_path: str = None):
-    """Render the final report."""
+@st.cache_data(ttl=30, show_spinner=False)
+def _list_charts(charts_dir: str, dir_mtime_ns: int) -> list:
+    """List chart images; the directory mtime in the key re-globs only on change."""
+    return [str(path) for path in Path(charts_dir).glob("*.png")]
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _load_png(path: str, mtime_ns: int) -> bytes:
+    """Read a chart once; the mtime in the key picks up regenerated charts."""
+    return Path(path).read_bytes()
+
+
+def render_final_report(report: str, report_path: str = None, generation: int = 0):
+    """Render the final report. `generation` identifies which research run produced it."""
     st.markdown("### 📄 Final Research Report")
     
     tabs = st.tabs(["📝 Report", "📥 Download", "🖼️ Visualizations"])
@@ -234,58 +314,121 @@ def render_final_report(report: str, report_path: str = None):
                 data=report,
                 file_name=f"research_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.md",
                 mime="text/markdown",
-                use_container_width=True
+                use_container_width=True,
+                key=f"download_report_{generation}"
             )
         
-        if report_path and Path(report_path).exists():
+        if report_path:
             st.success(f"Report also saved to: `{report_path}`")
     
     with tabs[2]:
         # Display any generated charts
-        charts_dir = Path("outputs/charts")
-        if charts_dir.exists():
-            chart_files = list(charts_dir.glob("*.png"))
+        try:
+            charts_mtime = os.stat(CHARTS_DIR).st_mtime_ns
+        except FileNotFoundError:
+            charts_mtime = None
+        
+        if charts_mtime is not None:
+            chart_files = _list_charts(CHARTS_DIR, charts_mtime)
             if chart_files:
                 st.markdown("#### Generated Visualizations")
                 
                 cols = st.columns(min(len(chart_files), 3))
                 for i, chart_path in enumerate(chart_files):
                     with cols[i % len(cols)]:
-                        st.image(str(chart_path), use_container_width=True)
+                        try:
+                            mtime = os.stat(chart_path).st_mtime_ns
+                        except FileNotFoundError:
+                            continue
+                        st.image(_load_png(chart_path, mtime), use_container_width=True)
             else:
                 st.info("No visualizations generated yet.")
         else:
             st.info("Charts directory not found.")
 
 
-def run_research_workflow(topic: str):
-    """Execute the research workflow."""
-    from orchestrator import ResearchOrchestrator
-    
-    # Status callback
-    def status_callback(status):
-        st.session_state.status_log.append(status)
-    
-    # Initialize orchestrator
-    orchestrator = ResearchOrchestrator(status_callback=status_callback)
-    st.session_state.orchestrator = orchestrator
-    st.session_state.is_running = True
-    st.session_state.status_log = []
-    
+def _research_job(orchestrator, topic: str, job: dict):
+    """
+    Run the research on a background thread.
+
+    Never touches st.session_state: status updates go through the
+    orchestrator's queue callback and the outcome is written to the job.
+    """
     try:
-        # Run research
         result = orchestrator.run_research(topic)
-        st.session_state.result = result
-        
     except Exception as e:
-        st.error(f"Research failed: {str(e)}")
-        st.session_state.result = {
+        result = {
             "success": False,
             "error": str(e)
         }
-        
-    finally:
-        st.session_state.is_running = False
+    
+    with job['lock']:
+        job['result'] = result
+        job['done'] = True
+
+
+def collect_finished_job() -> bool:
+    """Move a finished job's result into session state. Returns True if one finished."""
+    job = st.session_state.job
+    if job is None:
+        return False
+    
+    with job['lock']:
+        if not job['done']:
+            return False
+        result = job['result']
+    
+    # Check the saved report once here rather than on every rerun
+    report_path = result.get('report_path')
+    if report_path and not Path(report_path).exists():
+        result['report_path'] = None
+    
+    st.session_state.result = result
+    if result.get('success'):
+        st.session_state.report_generation += 1
+    st.session_state.job = None
+    st.session_state.is_running = False
+    return True
+
+
+def run_research_workflow(topic: str):
+    """Start the research workflow in the background and return immediately."""
+    # Status callback: only enqueue; the progress fragment drains the queue
+    # on its own timer, so bursts of updates reach the UI as one batch.
+    status_queue = Queue()
+    st.session_state.status_queue = status_queue
+
+    def status_callback(status):
+        status['markdown'] = format_status(status)
+        status_queue.put(status)
+    
+    # Reuse this session's orchestrator; only the callback changes per run
+    orchestrator = _get_orchestrator()
+    orchestrator.status_callback = status_callback
+    st.session_state.is_running = True
+    st.session_state.result = None
+    st.session_state.status_log = new_status_log()
+    st.session_state.log_window = None
+    
+    job = {"lock": threading.Lock(), "done": False, "result": None}
+    st.session_state.job = job
+    threading.Thread(
+        target=_research_job,
+        args=(orchestrator, topic, job),
+        daemon=True
+    ).start()
+
+
+def start_research():
+    """
+    Start button callback.
+
+    Runs before the script reruns, so the header and sidebar of that same
+    run already reflect the job and no extra st.rerun() is needed.
+    """
+    topic = st.session_state.topic
+    if topic and not st.session_state.is_running:
+        run_research_workflow(topic)
 
 
 def main():
@@ -294,18 +437,19 @@ def main():
     render_header()
     
     # Sidebar
-    topic, start_btn, clear_btn = render_sidebar()
+    clear_btn = render_sidebar()
     
     # Handle actions
+    collect_finished_job()
+    
     if clear_btn:
-        st.session_state.status_log = []
+        st.session_state.orchestrator = None
+        st.session_state.status_queue = Queue()
+        st.session_state.status_log = new_status_log()
+        st.session_state.log_window = None
         st.session_state.result = None
         st.session_state.is_running = False
-        st.rerun()
-    
-    if start_btn and topic:
-        with st.spinner("🤖 Agents are working..."):
-            run_research_workflow(topic)
+        st.session_state.job = None
         st.rerun()
     
     # Main content
@@ -325,9 +469,11 @@ def main():
                 
                 # Show report
                 if result.get('report'):
-                    render_final_report(
+                    # A fragment, so download/tab interactions rerun only the report
+                    st.fragment(render_final_report)(
                         result['report'],
-                        result.get('report_path')
+                        result.get('report_path'),
+                        st.session_state.report_generation
                     )
             else:
                 st.error(f"❌ Research Failed: {result.get('error')}")
@@ -396,7 +542,7 @@ def main():
     
     with col2:
         # Status log
-        render_status_log(st.session_state.status_log)
+        render_status_log()
 
 
 if __name__ == "__main__":
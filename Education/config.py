@@ -18,9 +18,22 @@ MAX_TOKENS = 8192
 MAX_SOURCES = 3
 MAX_SEARCH_RESULTS = 5
 REQUEST_TIMEOUT = 10
+MAX_PARALLEL_TOOL_CALLS = 5
 
 # Review Settings
 MAX_REVIEW_ITERATIONS = 2
+REVIEW_CONVERGENCE_RATIO = 0.95  # stop reviewing a section once rewrites are this similar
+
+# Cache Settings
+TOOL_CACHE_DIR = ".tool_cache"
+TOOL_CACHE_TTL = 86400  # seconds
+TOOL_CACHE_SIZE_LIMIT = 1 << 30  # bytes
+
+# UI Settings
+STATUS_POLL_INTERVAL = "250ms"  # progress panel flush/refresh while agents run
+MAX_LOG_LINES_IN_MEMORY = 5000
+MAX_LOG_LINES_IN_DOM = 50  # size of the rendered status log window
+LOG_PANEL_HEIGHT = 400  # px; the window scrolls inside a fixed-height container
 
 # Output Settings
 OUTPUT_DIR = "outputs"
@@ -2,23 +2,41 @@
 Custom tools for Phidata agents.
 These are callable functions that agents can use.
 """
+import re
 import requests
 from bs4 import BeautifulSoup
 from duckduckgo_search import DDGS
+from collections import Counter
+from functools import lru_cache
 from typing import List, Dict
 import json
 from config import MAX_SEARCH_RESULTS, REQUEST_TIMEOUT
 from logger_setup import log
 
 
+# Tokenizers and stopwords for analyze_text_statistics, built once at import
+_WORD_RE = re.compile(r'\b\w+\b')
+_SENTENCE_SPLIT_RE = re.compile(r'[.!?]+')
+_STOPWORDS = frozenset({
+    "the", "a", "an", "is", "are", "was", "were", "be", "been",
+    "being", "have", "has", "had", "do", "does", "did", "will",
+    "would", "could", "should", "to", "of", "in", "for", "on",
+    "with", "at", "by", "from", "and", "but", "or", "if"
+})
+
+
+@lru_cache(maxsize=1)
 def get_llm_client():
     """Return a simple local LLM client shim for offline/testing runs.
 
     The returned object implements `generate(prompt, system_prompt=None, temperature=0.7)`
     and returns a deterministic dummy string. Production runs should replace
-    this with a real Groq/Agno client.
+    this with a real Groq/Agno client. The client is built once and shared.
     """
     class _LocalLLM:
+        # Marks output as placeholder text that must never be cached
+        is_placeholder = True
+
         def generate(self, prompt, system_prompt=None, temperature=0.7):
             try:
                 text = prompt if isinstance(prompt, str) else str(prompt)
@@ -165,9 +183,6 @@ def analyze_text_statistics(text: str) -> str:
     Returns:
         Dictionary with word count, sentence count, etc.
     """
-    import re
-    from collections import Counter
-
     try:
         log.info("Analyzing text statistics")
 
@@ -190,21 +205,11 @@ def analyze_text_statistics(text: str) -> str:
             text = text[:MAX_CHARS]
 
         # Basic stats
-        words = re.findall(r'\b\w+\b', text.lower())
-        sentences = re.split(r'[.!?]+', text)
-        sentences = [s.strip() for s in sentences if s.strip()]
-
-        # Stopwords
-        stopwords = {
-            "the", "a", "an", "is", "are", "was", "were", "be", "been",
-            "being", "have", "has", "had", "do", "does", "did", "will",
-            "would", "could", "should", "to", "of", "in", "for", "on",
-            "with", "at", "by", "from", "and", "but", "or", "if"
-        }
+        words = _WORD_RE.findall(text.lower())
+        sentences = [s for s in _SENTENCE_SPLIT_RE.split(text) if s.strip()]
 
-        # Keywords
-        filtered_words = [w for w in words if w not in stopwords and len(w) > 3]
-        keyword_counts = Counter(filtered_words)
+        # Keywords (Counter tallies in C; the generator avoids a filtered copy)
+        keyword_counts = Counter(w for w in words if len(w) > 3 and w not in _STOPWORDS)
         top_keywords = dict(keyword_counts.most_common(15))
 
         stats = {
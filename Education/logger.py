@@ -6,8 +6,15 @@ from pathlib import Path
 from loguru import logger
 from config import LOG_FILE, LOG_LEVEL
 
+_configured = False
+
+
 def setup_logger():
-    """Configure loguru logger with file and console output."""
+    """Configure loguru logger with file and console output. Safe to call repeatedly."""
+    global _configured
+    if _configured:
+        return logger
+    _configured = True
     
     # Remove default handler
     logger.remove()
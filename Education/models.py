@@ -47,6 +47,14 @@ class Source:
     relevance_score: float = 0.0
 
 
+@dataclass
+class PreparedCorpus:
+    """Source text prepared once and shared by analysis and drafting."""
+    joined: str = ""
+    truncated_per_source: List[str] = field(default_factory=list)
+    digest: str = ""
+
+
 @dataclass
 class AnalysisResult:
     """Results from text analysis."""
@@ -92,3 +100,5 @@ class AgentLog:
     action: str
     message: str
     details: Optional[Dict] = None
+    # Display time, formatted once when the entry is created
+    ts_str: str = ""
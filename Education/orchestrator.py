@@ -19,7 +19,6 @@ from planner_agent import create_team_agent, create_planner_agent, create_worker
 from logger_setup import log
 from config import OUTPUT_DIR
 import requests
-from worker_agent import WorkerAgent
 from models import ResearchPlan, Task
 
 # Quick instrumentation: wrap requests.Session.request to log outgoing JSON POSTs
@@ -622,8 +621,10 @@ class ResearchOrchestrator:
             message: Status message
             details: Additional details
         """
+        now = datetime.now()
         status = {
-            "timestamp": datetime.now(),
+            "timestamp": now,
+            "ts_str": now.strftime('%H:%M:%S'),
             "phase": phase,
             "message": message,
             "details": details or {}
@@ -729,8 +730,12 @@ Provide detailed updates as you complete each task.
             
             # Execution: either run Agno worker agent (batch) or local WorkerAgent (streaming)
             if stream:
-                # Use local WorkerAgent to run tasks sequentially and emit partial reports
-                self.worker_instance = WorkerAgent()
+                # Use local WorkerAgent to run tasks sequentially and emit partial reports.
+                # One instance is reused; execute_plan resets its per-run state first.
+                if getattr(self, 'worker_instance', None) is None:
+                    # Imported here: it pulls in the matplotlib/wordcloud analyzer stack
+                    from worker_agent import WorkerAgent
+                    self.worker_instance = WorkerAgent()
                 # Build a simple ResearchPlan object with six tasks if the planner returned text
                 rp = ResearchPlan(topic=topic)
                 rp.tasks = [
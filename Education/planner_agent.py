@@ -5,18 +5,42 @@ Uses Agno (formerly Phidata) framework for proper multi-agent orchestration.
 from agno.agent import Agent
 from agno.models.groq import Groq
 from agno.tools.function import Function
-from config import GROQ_API_KEY, LLM_MODEL, LLM_TEMPERATURE
-from tools import (
-    search_web,
-    extract_webpage_content,
-    analyze_text_statistics,
-    analyze_sentiment,
-    create_visualization
-)
+from groq import DefaultHttpxClient
+from config import GROQ_API_KEY, LLM_MODEL, LLM_TEMPERATURE, MAX_PARALLEL_TOOL_CALLS
+import tools
 from logger_setup import log
+from tool_cache import cached
+from concurrent.futures import ThreadPoolExecutor
 import json
 
 
+def _err(msg: str) -> str:
+    """Serialize a tool error payload without building an intermediate dict."""
+    return '{"error": ' + json.dumps(msg) + '}'
+
+
+def _has_results(result) -> bool:
+    """Only cache search responses that actually returned hits."""
+    return isinstance(result, str) and result not in ('', '[]')
+
+
+def _has_content(result) -> bool:
+    """Only cache extractions that yielded page content."""
+    try:
+        return isinstance(result, str) and bool(json.loads(result).get('content'))
+    except Exception:
+        return False
+
+
+def _cached_search(query: str):
+    return cached("search_web", query, lambda: tools.search_web(query), should_store=_has_results)
+
+
+def _cached_extract(url: str):
+    return cached("extract_webpage_content", url, lambda: tools.extract_webpage_content(url),
+                  should_store=_has_content)
+
+
 # --- Tool wrappers: ensure agent tool calls always accept null/missing args
 # and return a JSON string as content (avoids Groq 'content missing' errors).
 def _safe_search_web(*args, **kwargs):
@@ -48,12 +72,12 @@ def _safe_search_web(*args, **kwargs):
         if not query:
             query = ''
 
-        result = search_web(query)
+        result = _cached_search(query)
         content = result if isinstance(result, str) else json.dumps(result)
         return content
     except Exception as e:
-        log.error(f"search_web tool error: {e}")
-        return json.dumps({"error": str(e)})
+        log.debug(f"search_web tool error: {e}")
+        return _err(str(e))
 
 
 def _safe_extract_webpage_content(*args, **kwargs):
@@ -85,12 +109,12 @@ def _safe_extract_webpage_content(*args, **kwargs):
         if not url:
             url = ''
 
-        result = extract_webpage_content(url)
+        result = _cached_extract(url)
         content = result if isinstance(result, str) else json.dumps(result)
         return content
     except Exception as e:
-        log.error(f"extract_webpage_content tool error: {e}")
-        return json.dumps({"error": str(e)})
+        log.debug(f"extract_webpage_content tool error: {e}")
+        return _err(str(e))
 
 
 def _safe_analyze_text_statistics(*args, **kwargs):
@@ -112,12 +136,12 @@ def _safe_analyze_text_statistics(*args, **kwargs):
                 text = text[:MAX_CHARS]
         except Exception:
             pass
-        result = analyze_text_statistics(text)
+        result = tools.analyze_text_statistics(text)
         content = result if isinstance(result, str) else json.dumps(result)
         return content
     except Exception as e:
-        log.error(f"analyze_text_statistics tool error: {e}")
-        return json.dumps({"error": str(e)})
+        log.debug(f"analyze_text_statistics tool error: {e}")
+        return _err(str(e))
 
 
 def _safe_analyze_sentiment(*args, **kwargs):
@@ -138,12 +162,12 @@ def _safe_analyze_sentiment(*args, **kwargs):
                 text = text[:MAX_CHARS_SENT]
         except Exception:
             pass
-        result = analyze_sentiment(text)
+        result = tools.analyze_sentiment(text)
         content = result if isinstance(result, str) else json.dumps(result)
         return content
     except Exception as e:
-        log.error(f"analyze_sentiment tool error: {e}")
-        return json.dumps({"error": str(e)})
+        log.debug(f"analyze_sentiment tool error: {e}")
+        return _err(str(e))
 
 
 def _safe_create_visualization(*args, **kwargs):
@@ -178,19 +202,170 @@ def _safe_create_visualization(*args, **kwargs):
         except Exception:
             pass
 
-        result = create_visualization(keywords_arg or {}, sentiment_arg or {}, topic_arg or "")
+        result = tools.create_visualization(keywords_arg or {}, sentiment_arg or {}, topic_arg or "")
         content = result if isinstance(result, str) else json.dumps(result)
         return content
     except Exception as e:
-        log.error(f"create_visualization tool error: {e}")
-        return json.dumps({"error": str(e)})
+        log.debug(f"create_visualization tool error: {e}")
+        return _err(str(e))
+
+
+
+def _run_one_tool(call) -> dict:
+    """Execute a single {name, args} entry from a run_tools batch."""
+    if isinstance(call, str):
+        try:
+            call = json.loads(call)
+        except Exception:
+            call = {}
+    if not isinstance(call, dict):
+        call = {}
+    name = call.get('name') or ''
+    args = call.get('args') or {}
+    if isinstance(args, str):
+        try:
+            args = json.loads(args)
+        except Exception:
+            pass
+
+    func = _TOOL_DISPATCH.get(name)
+    if func is None:
+        return {"name": name, "result": {"error": f"Unknown tool: {name}"}}
+
+    try:
+        content = func(**args) if isinstance(args, dict) else func(args)
+    except Exception as e:
+        # Contain the failure to this entry so the rest of the batch still returns
+        log.debug(f"run_tools {name} error: {e}")
+        content = _err(str(e))
+    # Embed parsed JSON so the combined payload is not double-encoded
+    try:
+        result = json.loads(content)
+    except Exception:
+        result = content
+    return {"name": name, "result": result}
+
+
+def _safe_run_tools(*args, **kwargs):
+    try:
+        calls = kwargs.get('calls') if 'calls' in kwargs else (args[0] if args else [])
+        if isinstance(calls, str):
+            calls = json.loads(calls)
+        if isinstance(calls, dict):
+            calls = calls.get('calls') or [calls]
+        if not isinstance(calls, list):
+            calls = []
+
+        # Fan the batch out across the pool; map() keeps results in call order
+        results = list(_EXECUTOR.map(_run_one_tool, calls))
+        return json.dumps(results)
+    except Exception as e:
+        log.debug(f"run_tools tool error: {e}")
+        return _err(str(e))
+
+
+_TOOL_DISPATCH = {
+    "search_web": _safe_search_web,
+    "extract_webpage_content": _safe_extract_webpage_content,
+    "analyze_text_statistics": _safe_analyze_text_statistics,
+    "analyze_sentiment": _safe_analyze_sentiment,
+    "create_visualization": _safe_create_visualization,
+}
+
+# Thread pool shared by run_tools batches (tool calls are network/IO bound)
+_EXECUTOR = ThreadPoolExecutor(max_workers=MAX_PARALLEL_TOOL_CALLS)
+
+
+def _schema(required: tuple, **props) -> dict:
+    """Build a JSON-schema object for tool parameters."""
+    return {"type": "object", "properties": props, "required": list(required)}
+
+
+# Tools available to the worker agent
+_WORKER_TOOLS = [
+    Function(
+        name="search_web",
+        description="Search the web using DuckDuckGo to find relevant sources",
+        parameters=_schema(
+            ("query",),
+            query={"type": "string"},
+            trustworthiness={"type": "string"},
+            source_filter={"type": "string"}
+        ),
+        function=_safe_search_web
+    ),
+    Function(
+        name="extract_webpage_content",
+        description="Extract text content from a webpage URL",
+        parameters=_schema(
+            ("url",),
+            url={"type": "string", "format": "uri"},
+            trustworthiness={"type": "string"}
+        ),
+        function=_safe_extract_webpage_content
+    ),
+    Function(
+        name="analyze_text_statistics",
+        description="Analyze text statistics including word count, keywords, etc.",
+        parameters=_schema(
+            ("text",),
+            text={"type": "string"},
+            analysis_type={"type": "string", "enum": ["statistics", "sentiment"]}
+        ),
+        function=_safe_analyze_text_statistics
+    ),
+    Function(
+        name="analyze_sentiment",
+        description="Analyze the sentiment of text",
+        parameters=_schema(
+            ("text",),
+            text={"type": "string"},
+            analysis_type={"type": "string", "enum": ["sentiment"]}
+        ),
+        function=_safe_analyze_sentiment
+    ),
+    Function(
+        name="create_visualization",
+        description="Create visualization charts from analysis results",
+        parameters=_schema(
+            ("analysis_results", "visualization_type"),
+            analysis_results={"type": "string"},
+            visualization_type={"type": "string", "enum": ["chart", "wordcloud"]}
+        ),
+        function=_safe_create_visualization
+    ),
+    Function(
+        name="run_tools",
+        description=(
+            "Run several tool calls in one step. Pass a list of {name, args} objects; "
+            "returns a list of {name, result} in the same order"
+        ),
+        parameters=_schema(
+            ("calls",),
+            calls={
+                "type": "array",
+                "items": _schema(
+                    ("name", "args"),
+                    name={"type": "string", "enum": list(_TOOL_DISPATCH)},
+                    args={"type": "object"}
+                )
+            }
+        ),
+        function=_safe_run_tools
+    )
+]
 
 
+# Shared HTTP client: the Groq model below reuses its keep-alive connection
+# pool, so TLS sessions are kept across agents and tool-call turns.
+_http_client = DefaultHttpxClient()
 
 # Initialize the LLM
 llm = Groq(
     id=LLM_MODEL,
-    api_key=GROQ_API_KEY
+    api_key=GROQ_API_KEY,
+    temperature=LLM_TEMPERATURE,
+    http_client=_http_client
 )
 
 
@@ -234,6 +409,22 @@ def create_planner_agent() -> Agent:
     return planner
 
 
+_tools_warmed = False
+
+
+def _warm_up_tools():
+    """Run the analysis tools once so lazy imports and lexicons load before the first real call."""
+    global _tools_warmed
+    if _tools_warmed:
+        return
+    _tools_warmed = True
+    try:
+        tools.analyze_text_statistics("warmup")
+        tools.analyze_sentiment("warmup")
+    except Exception as e:
+        log.debug(f"Tool warm-up skipped: {e}")
+
+
 def create_worker_agent() -> Agent:
     """
     Create the Worker Agent.
@@ -247,76 +438,6 @@ def create_worker_agent() -> Agent:
     - Generate final outputs
     """
     
-    # Define tools for the worker
-    tools = [
-        Function(
-            name="search_web",
-            description="Search the web using DuckDuckGo to find relevant sources",
-            parameters={
-                "type": "object",
-                "properties": {
-                    "query": {"type": "string"},
-                    "trustworthiness": {"type": "string"},
-                    "source_filter": {"type": "string"}
-                },
-                "required": ["query"]
-            },
-            function=_safe_search_web
-        ),
-        Function(
-            name="extract_webpage_content",
-            description="Extract text content from a webpage URL",
-            parameters={
-                "type": "object",
-                "properties": {
-                    "url": {"type": "string", "format": "uri"},
-                    "trustworthiness": {"type": "string"}
-                },
-                "required": ["url"]
-            },
-            function=_safe_extract_webpage_content
-        ),
-        Function(
-            name="analyze_text_statistics",
-            description="Analyze text statistics including word count, keywords, etc.",
-            parameters={
-                "type": "object",
-                "properties": {
-                    "text": {"type": "string"},
-                    "analysis_type": {"type": "string", "enum": ["statistics", "sentiment"]}
-                },
-                "required": ["text"]
-            },
-            function=_safe_analyze_text_statistics
-        ),
-        Function(
-            name="analyze_sentiment",
-            description="Analyze the sentiment of text",
-            parameters={
-                "type": "object",
-                "properties": {
-                    "text": {"type": "string"},
-                    "analysis_type": {"type": "string", "enum": ["sentiment"]}
-                },
-                "required": ["text"]
-            },
-            function=_safe_analyze_sentiment
-        ),
-        Function(
-            name="create_visualization",
-            description="Create visualization charts from analysis results",
-            parameters={
-                "type": "object",
-                "properties": {
-                    "analysis_results": {"type": "string"},
-                    "visualization_type": {"type": "string", "enum": ["chart", "wordcloud"]}
-                },
-                "required": ["analysis_results", "visualization_type"]
-            },
-            function=_safe_create_visualization
-        )
-    ]
-    
     worker = Agent(
         name="Worker Agent",
         model=llm,
@@ -338,6 +459,8 @@ def create_worker_agent() -> Agent:
             "- Use extract_webpage_content tool on each source URL",
             "- Collect and store the extracted text",
             "- Note any extraction issues",
+            "- When several URLs or analyses are pending, call run_tools once with all of them",
+            "  instead of one tool per turn; use the individual tools for single calls",
             "",
             "TASK 3 - DATA ANALYSIS:",
             "- Combine collected content",
@@ -371,9 +494,10 @@ def create_worker_agent() -> Agent:
             "Execute each task thoroughly before moving to the next.",
             "Provide clear status updates as you work."
         ],
-        tools=tools
+        tools=_WORKER_TOOLS
     )
     
+    _warm_up_tools()
     log.info("Worker Agent created with tools")
     return worker
 
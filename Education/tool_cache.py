@@ -0,0 +1,83 @@
+"""
+Persistent cache for agent tool results (web search, page extraction).
+Backed by diskcache so results survive Streamlit reruns and new sessions.
+If diskcache is not installed, caching is disabled and calls pass through.
+"""
+import argparse
+import threading
+from typing import Any, Callable, Hashable
+from config import TOOL_CACHE_DIR, TOOL_CACHE_TTL, TOOL_CACHE_SIZE_LIMIT
+from logger_setup import log
+
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Return the shared on-disk cache, or None if diskcache is unavailable."""
+    global _cache
+    if _cache is None and diskcache is not None:
+        # Tool calls run on a thread pool; open the cache exactly once
+        with _cache_lock:
+            if _cache is None:
+                _cache = diskcache.Cache(TOOL_CACHE_DIR, size_limit=TOOL_CACHE_SIZE_LIMIT)
+                log.info(f"Tool cache opened at {TOOL_CACHE_DIR}")
+    return _cache
+
+
+def cached(namespace: str, key: Hashable, compute: Callable[[], Any],
+           expire: int = TOOL_CACHE_TTL,
+           should_store: Callable[[Any], bool] = bool) -> Any:
+    """
+    Return the cached value for (namespace, key), computing and storing it on a miss.
+
+    Args:
+        namespace: Logical cache bucket (e.g. the tool name)
+        key: Cache key within the namespace
+        compute: Zero-argument callable producing the value on a miss
+        expire: Time-to-live in seconds
+        should_store: Predicate deciding whether a computed value is worth caching
+
+    Returns:
+        The cached or freshly computed value
+    """
+    cache = get_cache()
+    if cache is None:
+        return compute()
+
+    full_key = (namespace, key)
+    value = cache.get(full_key)
+    if value is not None:
+        log.debug(f"Tool cache hit: {namespace}")
+        return value
+
+    value = compute()
+    if should_store(value):
+        cache.set(full_key, value, expire=expire)
+    return value
+
+
+def purge() -> int:
+    """Remove every cached entry. Returns the number of entries removed."""
+    cache = get_cache()
+    if cache is None:
+        return 0
+    removed = cache.clear()
+    log.info(f"Tool cache purged ({removed} entries)")
+    return removed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the persistent tool cache.")
+    parser.add_argument("--purge", action="store_true", help="Delete all cached tool results")
+    args = parser.parse_args()
+
+    if args.purge:
+        print(f"Removed {purge()} cached entries from {TOOL_CACHE_DIR}")
+    else:
+        parser.print_help()
@@ -1,11 +1,7 @@
-# Wrapper tools module to re-export tool functions expected by planner_agent
-from llm_client import (
-    search_web,
-    extract_webpage_content,
-    analyze_text_statistics,
-    analyze_sentiment,
-    create_visualization,
-)
+# Wrapper tools module to re-export tool functions expected by planner_agent.
+# The functions are resolved lazily (PEP 562) so importing this module does not
+# pull in llm_client and its scraping/search dependencies until a tool is used.
+import importlib
 
 __all__ = [
     "search_web",
@@ -14,3 +10,15 @@ __all__ = [
     "analyze_sentiment",
     "create_visualization",
 ]
+
+
+def __getattr__(name):
+    if name in __all__:
+        value = getattr(importlib.import_module("llm_client"), name)
+        globals()[name] = value  # cache so later lookups skip __getattr__
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
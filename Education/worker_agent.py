@@ -2,20 +2,69 @@
 Worker Agent - Executes all research tasks autonomously.
 Handles: Collection, Analysis, Writing, and Review.
 """
+import difflib
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import List, Dict, Callable
 from models import (
     Task, TaskStatus, ResearchPlan, ResearchReport, 
-    Source, AnalysisResult, AgentLog, AgentType
+    Source, AnalysisResult, AgentLog, AgentType, PreparedCorpus
 )
 from llm_client import get_llm_client
 from data_collector import DataCollector
 from analyzer import TextAnalyzer
 from report_generator import ReportGenerator
-from config import MAX_SOURCES, MAX_REVIEW_ITERATIONS
+from config import MAX_SOURCES, MAX_REVIEW_ITERATIONS, REVIEW_CONVERGENCE_RATIO
+from tool_cache import cached
 from logger_setup import log
 
 
+def _digest(text: str) -> str:
+    """Short content hash used in LLM cache keys."""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _has_converged(current: str, improved: str) -> bool:
+    """True if a rewrite is nearly word-for-word the same as its input."""
+    matcher = difflib.SequenceMatcher(None, current.split(), improved.split(), autojunk=False)
+    # real_quick_ratio/quick_ratio are cheap upper bounds of ratio() that
+    # ignore word order, so they can only reject, never accept
+    if matcher.real_quick_ratio() <= REVIEW_CONVERGENCE_RATIO:
+        return False
+    if matcher.quick_ratio() <= REVIEW_CONVERGENCE_RATIO:
+        return False
+    return matcher.ratio() > REVIEW_CONVERGENCE_RATIO
+
+
+def _llm_identity(llm) -> str:
+    """Client class and model name, so cached text is tied to the LLM that wrote it."""
+    cls = type(llm)
+    model = getattr(llm, "model", None) or getattr(llm, "id", None) or ""
+    return f"{cls.__module__}.{cls.__qualname__}:{model}"
+
+
+def _cached_generation(llm, namespace: str, key: tuple, compute: Callable[[], str], **kwargs) -> str:
+    """Cache LLM output under the client's identity; placeholder clients are never cached."""
+    if getattr(llm, "is_placeholder", False):
+        return compute()
+    return cached(namespace, (_llm_identity(llm),) + key, compute, **kwargs)
+
+
+def prepare_corpus(sources: List[Source]) -> PreparedCorpus:
+    """Join, slice and hash the collected source text in a single pass."""
+    truncated = [s.content[:1500] for s in sources]
+    digest = hashlib.blake2b(digest_size=16)
+    for source, text in zip(sources, truncated):
+        digest.update(f"{source.title}\0{text}\0".encode("utf-8"))
+    return PreparedCorpus(
+        joined=" ".join(s.content for s in sources),
+        truncated_per_source=truncated,
+        digest=digest.hexdigest()
+    )
+
+
 class WorkerAgent:
     """Agent that performs all research work autonomously."""
     
@@ -25,9 +74,11 @@ class WorkerAgent:
         self.analyzer = TextAnalyzer()
         self.generator = ReportGenerator()
         self.log_callback = log_callback
+        self._log_lock = threading.Lock()
         
         # State
         self.sources: List[Source] = []
+        self.corpus: PreparedCorpus = None
         self.analysis: AnalysisResult = None
         self.report: ResearchReport = None
         
@@ -35,20 +86,31 @@ class WorkerAgent:
     
     def _emit_log(self, action: str, message: str, details: dict = None):
         """Emit a log entry for the UI."""
+        now = datetime.now()
         entry = AgentLog(
-            timestamp=datetime.now(),
+            timestamp=now,
             agent=AgentType.WORKER,
             action=action,
             message=message,
-            details=details
+            details=details,
+            ts_str=now.strftime('%H:%M:%S')
         )
-        if self.log_callback:
-            self.log_callback(entry)
-        log.info(f"[WORKER] {action}: {message}")
+        # Sections are drafted/reviewed on worker threads
+        with self._log_lock:
+            if self.log_callback:
+                self.log_callback(entry)
+            log.info(f"[WORKER] {action}: {message}")
     
     def execute_plan(self, plan: ResearchPlan, 
                     task_callback: Callable = None) -> ResearchReport:
         """Execute all tasks in the research plan."""
+        # The instance is reused across runs; never let a previous topic's
+        # results stand in for a step this run did not reach
+        self.sources = []
+        self.corpus = None
+        self.analysis = None
+        self.report = None
+        
         self._emit_log("START", f"Beginning research on: {plan.topic}")
         
         for task in plan.tasks:
@@ -111,30 +173,40 @@ Respond with just the search query, nothing else."""
         
         # Search for sources
         self.sources = self.collector.search(search_query, MAX_SOURCES + 2)
+        self.corpus = None
         
-        source_list = "\n".join([f"- {s.title}" for s in self.sources[:MAX_SOURCES]])
+        source_list = "\n".join(f"- {s.title}" for s in self.sources[:MAX_SOURCES])
         return f"Found {len(self.sources)} sources:\n{source_list}"
     
     def _task_collect_content(self) -> str:
         """Task 2: Collect content from sources."""
         self._emit_log("COLLECT", f"Extracting content from {len(self.sources)} sources")
         
-        collected = []
-        for i, source in enumerate(self.sources[:MAX_SOURCES]):
+        def extract(source):
             self._emit_log("EXTRACT", f"Extracting: {source.title[:50]}...")
-            source = self.collector.extract_content(source)
-            if source.content:
-                collected.append(source)
+            return self.collector.extract_content(source)
+        
+        # Each extraction is an independent HTTP fetch; map keeps source order
+        targets = self.sources[:MAX_SOURCES]
+        with ThreadPoolExecutor(max_workers=min(16, max(len(targets), 1))) as executor:
+            collected = [source for source in executor.map(extract, targets) if source.content]
         
         self.sources = collected
+        self.corpus = prepare_corpus(self.sources)
         total_chars = sum(len(s.content) for s in self.sources)
         return f"Collected {total_chars:,} characters from {len(self.sources)} sources"
     
+    def _get_corpus(self) -> PreparedCorpus:
+        """Return the prepared corpus, building it if collection was skipped."""
+        if self.corpus is None:
+            self.corpus = prepare_corpus(self.sources)
+        return self.corpus
+    
     def _task_analyze(self, topic: str) -> str:
         """Task 3: Analyze collected content."""
         self._emit_log("ANALYZE", "Running text analysis...")
         
-        self.analysis = self.analyzer.analyze(self.sources, topic)
+        self.analysis = self.analyzer.analyze(self.sources, topic, self._get_corpus())
         
         return (f"Analysis complete: {self.analysis.word_count:,} words, "
                 f"sentiment: {self.analysis.sentiment_label}")
@@ -143,11 +215,12 @@ Respond with just the search query, nothing else."""
         """Task 4: Draft the research report."""
         self._emit_log("DRAFT", "Generating report sections...")
         
-        # Prepare context
-        source_context = "\n\n".join([
-            f"SOURCE: {s.title}\n{s.content[:1500]}" 
-            for s in self.sources
-        ])
+        # Prepare context from the slices cut once at collection time
+        corpus = self._get_corpus()
+        source_context = "\n\n".join(
+            f"SOURCE: {s.title}\n{text}" 
+            for s, text in zip(self.sources, corpus.truncated_per_source)
+        )
         
         analysis_context = f"""
 ANALYSIS RESULTS:
@@ -156,7 +229,6 @@ ANALYSIS RESULTS:
 - Top keywords: {', '.join(list(self.analysis.top_keywords.keys())[:10])}
 """
         
-        sections = {}
         section_prompts = {
             "Executive Summary": "Write a concise executive summary (2-3 paragraphs) of the research findings.",
             "Introduction": "Write an introduction explaining the topic and its significance.",
@@ -169,21 +241,38 @@ ANALYSIS RESULTS:
 and well-structured content based on the provided sources and analysis. 
 Be factual and cite findings from the sources."""
 
-        for section, instruction in section_prompts.items():
+        # Shared by every section prompt; built and hashed once up front.
+        # The corpus, analysis and system prompt digests key the draft cache,
+        # so re-running a topic over the same sources skips the LLM round trips.
+        context_block = f"{source_context}\n\n{analysis_context}"
+        analysis_digest = _digest(analysis_context)
+        system_digest = _digest(system_prompt)
+
+        def draft_section(item):
+            section, instruction = item
             self._emit_log("WRITING", f"Writing section: {section}")
             
-            prompt = f"""Based on the following sources and analysis, {instruction}
+            def generate():
+                prompt = f"""Based on the following sources and analysis, {instruction}
 
 TOPIC: {topic}
 
-{source_context}
-
-{analysis_context}
+{context_block}
 
 Write the {section} section:"""
+                return self.llm.generate(prompt, system_prompt, temperature=0.7)
             
-            content = self.llm.generate(prompt, system_prompt, temperature=0.7)
-            sections[section] = content.strip()
+            content = _cached_generation(
+                self.llm,
+                "draft_section",
+                (topic, section, instruction, corpus.digest, analysis_digest, system_digest, 0.7),
+                generate,
+            )
+            return section, content.strip()
+        
+        # Sections are independent LLM calls, so draft them concurrently
+        with ThreadPoolExecutor(max_workers=len(section_prompts)) as executor:
+            sections = dict(executor.map(draft_section, section_prompts.items()))
         
         # Create report object and record contributors
         contributors = ["Planner Agent", "Worker Agent"]
@@ -209,13 +298,11 @@ Write the {section} section:"""
 Identify specific improvements needed and rewrite sections to be clearer, 
 more professional, and better structured. Focus on clarity and accuracy."""
 
-        improvements = 0
+        topic = self.report.topic
         
-        for iteration in range(MAX_REVIEW_ITERATIONS):
-            self._emit_log("REVIEW_ITERATION", f"Review iteration {iteration + 1}")
-            
-            for section_name, content in self.report.sections.items():
-                prompt = f"""Review and improve this section of a research report on "{self.report.topic}".
+        def review_section(item):
+            section_name, content = item
+            prompt = f"""Review and improve this section of a research report on "{topic}".
 
 SECTION: {section_name}
 CURRENT CONTENT:
@@ -228,14 +315,40 @@ Provide an improved version that is:
 4. Factually accurate
 
 Return ONLY the improved content, no explanations."""
+            
+            improved = _cached_generation(
+                self.llm,
+                "review_section",
+                (_digest(f"{system_prompt}\0{prompt}"), 0.5),
+                lambda: self.llm.generate(prompt, system_prompt, temperature=0.5),
+                should_store=lambda text: len(text.strip()) > 50,
+            )
+            return section_name, improved.strip()
+        
+        improvements = 0
+        iterations = 0
+        converged = set()
+        
+        # Iterations stay sequential (each builds on the last); sections
+        # within an iteration are reviewed concurrently
+        with ThreadPoolExecutor(max_workers=len(self.report.sections) or 1) as executor:
+            for iteration in range(MAX_REVIEW_ITERATIONS):
+                pending = [item for item in self.report.sections.items() if item[0] not in converged]
+                if not pending:
+                    break
+                iterations += 1
+                self._emit_log("REVIEW_ITERATION", f"Review iteration {iteration + 1}")
                 
-                improved = self.llm.generate(prompt, system_prompt, temperature=0.5)
-                
-                if len(improved.strip()) > 50:  # Valid improvement
-                    self.report.sections[section_name] = improved.strip()
-                    improvements += 1
+                for section_name, improved in executor.map(review_section, pending):
+                    current = self.report.sections[section_name]
+                    # A rewrite barely different from its input has converged
+                    if _has_converged(current, improved):
+                        converged.add(section_name)
+                    if len(improved) > 50:  # Valid improvement
+                        self.report.sections[section_name] = improved
+                        improvements += 1
         
-        return f"Completed {MAX_REVIEW_ITERATIONS} review iterations, {improvements} improvements"
+        return f"Completed {iterations} review iterations, {improvements} improvements"
     
     def _task_finalize(self) -> str:
         """Task 6: Generate final report outputs."""
@@ -3,45 +3,286 @@ Multi-Agent Medical Analysis System
 Handles all agent logic and coordination
 """
 
+import asyncio
+import hashlib
+import json
 import os
+import re
+import threading
+from string import Template
+import httpx
 from agno.agent import Agent
 from agno.models.groq import Groq
+from agno.run.agent import RunContentEvent
+from config import (
+    GROQ_MODEL_ID, GROQ_TIMEOUT, GROQ_MAX_CONNECTIONS, PROMPT_VERSION,
+    RESULT_CACHE_DIR, RESULT_CACHE_TTL,
+    REPORT_TOKEN_BUDGET, REPORT_HEAD_TOKENS, REPORT_TAIL_TOKENS, CHARS_PER_TOKEN,
+    PREFETCH_COORDINATOR_PREFIX
+)
+
+try:
+    import diskcache
+except ImportError:
+    # Optional: without diskcache, results are not cached between runs
+    diskcache = None
+
+try:
+    import tiktoken
+except ImportError:
+    # Optional: without tiktoken, report length is estimated from characters
+    tiktoken = None
+
+try:
+    import h2  # noqa: F401 - only needed for httpx's HTTP/2 support
+    HTTP2_AVAILABLE = True
+except ImportError:
+    # Optional: without h2, requests share pooled HTTP/1.1 connections instead
+    HTTP2_AVAILABLE = False
+
+TRUNCATION_MARKER = "\n... [middle truncated for brevity] ...\n"
+
+_encoder = None
+_encoder_lock = threading.Lock()
+
+# The diagnostic and specialist agents close their reply with a compact JSON
+# summary. The coordinator reads that instead of the full prose, which keeps
+# its prompt (the slowest call in the pipeline) a fraction of the size.
+SUMMARY_KEYS = ("symptoms", "urgent_flags", "differentials", "tests", "treatments")
+SUMMARY_INSTRUCTION = (
+    "After the analysis, end with a fenced ```json block holding one object with the keys "
+    + ", ".join(f'"{key}"' for key in SUMMARY_KEYS)
+    + ", each a list of short phrases (use [] when nothing applies)"
+)
+_SUMMARY_BLOCK = re.compile(r"```json\s*(\{.*\})\s*```\s*$", re.DOTALL)
+
+# Static instructions for each agent
+DIAGNOSTIC_INSTRUCTIONS = (
+    "Analyze medical reports and symptoms thoroughly",
+    "Identify key concerns and potential diagnoses",
+    "Flag urgent issues that need immediate attention",
+    "Be concise and specific with medical terminology",
+    "Focus on pattern recognition in symptoms",
+    "Consider vital signs and their implications",
+    "Identify any life-threatening conditions first",
+    "Structure every analysis as:",
+    "1. **Primary Symptoms & Findings**: List the key symptoms and clinical findings",
+    "2. **Initial Diagnostic Impression**: What conditions are most likely based on the presentation?",
+    "3. **Urgent Red Flags**: Any critical issues requiring immediate attention?",
+    "4. **Vital Signs Assessment**: Analysis of vital signs and their significance",
+    "Provide a structured, concise analysis",
+    SUMMARY_INSTRUCTION
+)
+
+SPECIALIST_INSTRUCTIONS = (
+    "Provide specialized medical insights based on findings",
+    "Suggest specific diagnostic tests or investigations needed",
+    "Consider rare conditions and potential complications",
+    "Recommend evidence-based treatment approaches",
+    "Note any drug interactions or contraindications",
+    "Consider differential diagnoses",
+    "Identify specialists that should be consulted",
+    "Structure every consultation as:",
+    "1. **Specialized Medical Insights**: Deeper analysis from a specialist perspective",
+    "2. **Recommended Investigations**: Specific tests, imaging, or labs needed",
+    "3. **Differential Diagnoses**: Other conditions to rule out",
+    "4. **Treatment Considerations**: Evidence-based treatment options and approaches",
+    "5. **Risk Factors & Complications**: What to monitor and potential complications",
+    "Be specific and actionable",
+    SUMMARY_INSTRUCTION
+)
+
+COORDINATOR_INSTRUCTIONS = (
+    "Synthesize findings from diagnostic and specialist agents",
+    "Create clear, actionable medical recommendations",
+    "Prioritize next steps for patient care with timelines",
+    "Ensure nothing critical is missed from other agents",
+    "Provide patient-friendly summary without medical jargon",
+    "Create a cohesive care plan",
+    "Highlight follow-up requirements",
+    "Structure every care plan as:",
+    "1. **Summary Assessment**: Brief overview of the patient's condition",
+    "2. **Priority Action Items**: Immediate steps needed (with urgency levels)",
+    "3. **Recommended Care Plan**: Short-term and long-term management",
+    "4. **Follow-up Requirements**: When and what type of follow-ups needed",
+    "5. **Patient-Friendly Explanation**: Simple language summary for patient understanding",
+    "Ensure all critical points from both agents are included and nothing is missed"
+)
+
+# Prompt layouts. Every prompt opens with the same report block (the section
+# layouts live in each agent's static instructions) and puts per-agent input
+# last, so repeated requests share a prefix the provider can cache.
+_REPORT_BLOCK = Template("""**Medical Report:**
+$report""")
+
+_DIAGNOSTIC_PROMPT = Template("""$report_block
+
+Analyze this medical report.""")
+
+_SPECIALIST_PROMPT = Template("""$report_block
+
+**Initial Diagnostic Findings:**
+$findings
+
+Provide specialist-level consultation on this report and the initial diagnostic findings.""")
+
+_COORDINATOR_PROMPT = Template("""$report_block
+
+**Diagnostic Findings (Dr. Diagnostic):**
+$diagnostic
+
+**Specialist Findings (Dr. Specialist):**
+$specialist
+
+Synthesize these analyses into a comprehensive, actionable care plan.""")
+
+_COORDINATOR_WARMUP_PROMPT = Template("""$report_block
+
+(awaiting sub-analyses)""")
+
+# Part of every result-cache key, so editing any instruction or prompt layout
+# stops old analyses from being served
+_PROMPT_FINGERPRINT = hashlib.blake2b("\0".join(
+    DIAGNOSTIC_INSTRUCTIONS + SPECIALIST_INSTRUCTIONS + COORDINATOR_INSTRUCTIONS + tuple(
+        template.template for template in
+        (_REPORT_BLOCK, _DIAGNOSTIC_PROMPT, _SPECIALIST_PROMPT, _COORDINATOR_PROMPT)
+    )
+).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _get_encoder():
+    """Return the shared tiktoken encoder, or None if it cannot be loaded.
+
+    The first call may download the encoding file, so MedicalAgentSystem
+    loads it at construction rather than on the event loop mid-analysis.
+    """
+    global _encoder
+    if _encoder is None:
+        with _encoder_lock:
+            if _encoder is None:
+                encoder = False
+                if tiktoken is not None:
+                    try:
+                        encoder = tiktoken.get_encoding("cl100k_base")
+                    except Exception:
+                        # Offline without a cached encoding file: estimate instead
+                        pass
+                _encoder = encoder
+    return _encoder or None
+
+
+def truncate_report(text):
+    """Keep the head and tail of a report that exceeds the token budget.
+
+    Returns (text, original_token_count); text is unchanged when within budget.
+    """
+    encoder = _get_encoder()
+    if encoder is not None:
+        tokens = encoder.encode(text)
+        if len(tokens) <= REPORT_TOKEN_BUDGET:
+            return text, len(tokens)
+        head = encoder.decode(tokens[:REPORT_HEAD_TOKENS])
+        tail = encoder.decode(tokens[-REPORT_TAIL_TOKENS:])
+        return head + TRUNCATION_MARKER + tail, len(tokens)
+    
+    estimated = len(text) // CHARS_PER_TOKEN
+    if estimated <= REPORT_TOKEN_BUDGET:
+        return text, estimated
+    head = text[:REPORT_HEAD_TOKENS * CHARS_PER_TOKEN]
+    tail = text[-REPORT_TAIL_TOKENS * CHARS_PER_TOKEN:]
+    return head + TRUNCATION_MARKER + tail, estimated
+
+
+def _discard_outcome(task):
+    """Done-callback for fire-and-forget tasks: retrieve the outcome so failures stay quiet"""
+    if not task.cancelled():
+        task.exception()
+
+
+def split_summary(text):
+    """Split an agent reply into (prose, summary dict), or (text, None) if it has no valid summary"""
+    match = _SUMMARY_BLOCK.search(text or "")
+    if not match:
+        return text, None
+    try:
+        summary = json.loads(match.group(1))
+    except ValueError:
+        return text, None
+    if not isinstance(summary, dict):
+        return text, None
+    return text[:match.start()].rstrip(), summary
+
+
+def format_summary(summary):
+    """Render a summary dict as short 'key: a; b' lines for the coordinator prompt"""
+    lines = []
+    for key in SUMMARY_KEYS:
+        values = summary.get(key) or []
+        if isinstance(values, str):
+            values = [values]
+        if values:
+            lines.append(f"{key}: {'; '.join(str(value) for value in values)}")
+    return "\n".join(lines) or "(no findings listed)"
 
 
 class MedicalAgentSystem:
     """Manages multiple specialized medical AI agents"""
     
+    # Groq models (and their pooled HTTP clients) shared by every instance, keyed on api_key
+    _llm_cache = {}
+    # On-disk cache of finished analyses, opened on first use
+    _result_cache = None
+    
     def __init__(self, api_key):
         """Initialize the agent system with Groq API key"""
         self.api_key = api_key
-        os.environ['GROQ_API_KEY'] = api_key
-        # Create a Groq model/client instance and reuse for all agents
-        # Use the Groq model id expected by the system
-        try:
-            self.llm = Groq(id="llama-3.1-8b-instant", api_key=api_key)
-        except TypeError:
-            # Older/newer Groq APIs may accept api_key as first arg
-            self.llm = Groq(api_key=api_key)
+        self.llm = self._get_llm(api_key)
         
         # Initialize agents
         self.diagnostic_agent = self._create_diagnostic_agent()
         self.specialist_agent = self._create_specialist_agent()
         self.coordinator_agent = self._create_coordinator_agent()
+        self._warmup_agent = None
+        
+        # Load (and possibly download) the tokenizer here, on the caller's
+        # thread, so truncate_report never blocks the shared event loop
+        _get_encoder()
+    
+    @classmethod
+    def _get_llm(cls, api_key):
+        """Return the shared Groq model for this key, creating it on first use"""
+        llm = cls._llm_cache.get(api_key)
+        if llm is None:
+            # Create a Groq model/client instance and reuse for all agents.
+            # Its async client sends every call through one pooled httpx
+            # client, so concurrent agents reuse warm connections (multiplexed
+            # over a single HTTP/2 connection when h2 is installed).
+            http_client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                timeout=GROQ_TIMEOUT,
+                limits=httpx.Limits(max_connections=GROQ_MAX_CONNECTIONS),
+            )
+            try:
+                llm = Groq(id=GROQ_MODEL_ID, api_key=api_key, http_client=http_client)
+            except TypeError:
+                # Older/newer Groq APIs may accept api_key as first arg
+                llm = Groq(api_key=api_key)
+            cls._llm_cache[api_key] = llm
+        return llm
+    
+    @classmethod
+    def _get_result_cache(cls):
+        """Return the shared on-disk result cache, or None if diskcache is unavailable"""
+        if cls._result_cache is None and diskcache is not None:
+            cls._result_cache = diskcache.Cache(RESULT_CACHE_DIR)
+        return cls._result_cache
     
     def _create_diagnostic_agent(self):
         """Creates agent for initial diagnosis and symptom analysis"""
         return Agent(
             name="Dr. Diagnostic",
             role="Primary Diagnostic Physician",
-            instructions=[
-                "Analyze medical reports and symptoms thoroughly",
-                "Identify key concerns and potential diagnoses",
-                "Flag urgent issues that need immediate attention",
-                "Be concise and specific with medical terminology",
-                "Focus on pattern recognition in symptoms",
-                "Consider vital signs and their implications",
-                "Identify any life-threatening conditions first"
-            ],
+            instructions=list(DIAGNOSTIC_INSTRUCTIONS),
             model=self.llm
         )
     
@@ -50,42 +291,57 @@ class MedicalAgentSystem:
         return Agent(
             name="Dr. Specialist",
             role="Medical Specialist Consultant",
-            instructions=[
-                "Provide specialized medical insights based on findings",
-                "Suggest specific diagnostic tests or investigations needed",
-                "Consider rare conditions and potential complications",
-                "Recommend evidence-based treatment approaches",
-                "Note any drug interactions or contraindications",
-                "Consider differential diagnoses",
-                "Identify specialists that should be consulted"
-            ],
+            instructions=list(SPECIALIST_INSTRUCTIONS),
             model=self.llm
         )
     
-    def _create_coordinator_agent(self):
+    def _create_coordinator_agent(self, model=None):
         """Creates coordinator agent for synthesis"""
         return Agent(
             name="Dr. Coordinator",
             role="Medical Case Coordinator",
-            instructions=[
-                "Synthesize findings from diagnostic and specialist agents",
-                "Create clear, actionable medical recommendations",
-                "Prioritize next steps for patient care with timelines",
-                "Ensure nothing critical is missed from other agents",
-                "Provide patient-friendly summary without medical jargon",
-                "Create a cohesive care plan",
-                "Highlight follow-up requirements"
-            ],
-            model=self.llm
+            instructions=list(COORDINATOR_INSTRUCTIONS),
+            model=model or self.llm
         )
     
-    def analyze_report(self, medical_report, log_callback=None):
+    def _get_warmup_agent(self):
+        """Coordinator clone limited to a 1-token reply, used only to warm the prompt cache"""
+        if self._warmup_agent is None:
+            warmup_llm = Groq(id=GROQ_MODEL_ID, api_key=self.api_key, max_tokens=1,
+                              http_client=self.llm.http_client)
+            self._warmup_agent = self._create_coordinator_agent(warmup_llm)
+        return self._warmup_agent
+    
+    async def _run_agent(self, agent, prompt, on_token=None):
+        """Run one agent and return its reply, passing the text so far to on_token as it streams"""
+        if on_token is None:
+            response = await agent.arun(prompt)
+            return response.content
+        
+        content = ""
+        async for event in agent.arun(prompt, stream=True):
+            if isinstance(event, RunContentEvent) and event.content:
+                content += event.content
+                on_token(content)
+        return content
+    
+    async def analyze_report(self, medical_report, log_callback=None, parallel=True, use_cache=True,
+                             token_callback=None, prefetch_prefix=PREFETCH_COORDINATOR_PREFIX):
         """
         Run multi-agent analysis on a medical report
         
         Args:
             medical_report (str): The medical report text to analyze
             log_callback (callable): Optional callback function for logging (agent_name, event)
+            parallel (bool): Run the diagnostic and specialist agents concurrently, with the
+                specialist working from the report alone. Set to False to feed the diagnostic
+                findings into the specialist prompt (three sequential calls).
+            use_cache (bool): Return a stored result for an identical report instead of
+                calling the agents again.
+            token_callback (callable): Optional callback (agent_key, text_so_far) called as each
+                agent streams its reply; agent_key is 'diagnostic', 'specialist' or 'coordinator'.
+            prefetch_prefix (bool): Warm the provider's prompt cache for the coordinator
+                while the first two agents run (one extra 1-token request).
         
         Returns:
             dict: Analysis results from all agents
@@ -97,90 +353,139 @@ class MedicalAgentSystem:
             if log_callback:
                 log_callback(agent_name, event)
         
-        try:
-            # Step 1: Diagnostic Agent Analysis
+        def tokens_for(agent_key):
+            if token_callback:
+                # Hide the trailing JSON summary while it streams in
+                return lambda text: token_callback(agent_key, text.split("```json", 1)[0])
+            return None
+        
+        def brief(reply):
+            # (text to display, compact findings to pass on); falls back to
+            # the full text when the agent left out or mangled its summary
+            prose, summary = split_summary(reply)
+            return prose, format_summary(summary) if summary is not None else prose
+        
+        cache = self._get_result_cache() if use_cache else None
+        cache_key = hashlib.blake2b("\0".join((
+            str(PROMPT_VERSION), _PROMPT_FINGERPRINT,
+            str(self.llm.id), str(getattr(self.llm, "temperature", None)),
+            str(parallel), medical_report
+        )).encode("utf-8")).hexdigest()
+        if cache is not None:
+            cached = cache.get(cache_key)
+            if cached is not None:
+                log("System", "⚡ Cache hit — returning the stored analysis, no tokens spent")
+                return dict(cached)
+        
+        prompt_report, report_tokens = truncate_report(medical_report)
+        if prompt_report is not medical_report:
+            log("System", f"✂️ Report is ~{report_tokens} tokens; sending its first {REPORT_HEAD_TOKENS} "
+                          f"and last {REPORT_TAIL_TOKENS} tokens to the agents")
+        report_block = _REPORT_BLOCK.substitute(report=prompt_report)
+        
+        async def run_diagnostic():
             log("System", "🔴 Initializing Dr. Diagnostic...")
             log("Dr. Diagnostic", "Reviewing medical report and analyzing symptoms...")
             
-            diagnostic_prompt = f"""Analyze this medical report and provide:
-
-1. **Primary Symptoms & Findings**: List the key symptoms and clinical findings
-2. **Initial Diagnostic Impression**: What conditions are most likely based on the presentation?
-3. **Urgent Red Flags**: Any critical issues requiring immediate attention?
-4. **Vital Signs Assessment**: Analysis of vital signs and their significance
-
-Medical Report:
-{medical_report}
-
-Provide a structured, concise analysis."""
+            diagnostic_prompt = _DIAGNOSTIC_PROMPT.substitute(report_block=report_block)
             
-            diagnostic_response = self.diagnostic_agent.run(diagnostic_prompt)
-            results['diagnostic'] = diagnostic_response.content
+            diagnostic = await self._run_agent(self.diagnostic_agent, diagnostic_prompt, tokens_for('diagnostic'))
             log("Dr. Diagnostic", "✅ Primary analysis complete")
-            
-            # Step 2: Specialist Analysis
+            return diagnostic
+        
+        async def run_specialist(diagnostic_findings):
             log("System", "🔵 Consulting Dr. Specialist...")
             log("Dr. Specialist", "Providing specialized consultation and recommendations...")
             
-            specialist_prompt = f"""Based on this medical report and the initial diagnostic findings, provide specialist-level consultation:
-
-**Medical Report:**
-{medical_report}
-
-**Initial Diagnostic Findings:**
-{results['diagnostic']}
-
-Please provide:
-
-1. **Specialized Medical Insights**: Deeper analysis from a specialist perspective
-2. **Recommended Investigations**: Specific tests, imaging, or labs needed
-3. **Differential Diagnoses**: Other conditions to rule out
-4. **Treatment Considerations**: Evidence-based treatment options and approaches
-5. **Risk Factors & Complications**: What to monitor and potential complications
-
-Be specific and actionable."""
+            specialist_prompt = _SPECIALIST_PROMPT.substitute(
+                report_block=report_block, findings=diagnostic_findings
+            )
             
-            specialist_response = self.specialist_agent.run(specialist_prompt)
-            results['specialist'] = specialist_response.content
+            specialist = await self._run_agent(self.specialist_agent, specialist_prompt, tokens_for('specialist'))
             log("Dr. Specialist", "✅ Specialist consultation complete")
+            return specialist
+        
+        warmup = None
+        if prefetch_prefix:
+            warmup = asyncio.create_task(self._get_warmup_agent().arun(
+                _COORDINATOR_WARMUP_PROMPT.substitute(report_block=report_block)
+            ))
+            warmup.add_done_callback(_discard_outcome)
+        
+        try:
+            # Steps 1 & 2: Diagnostic and Specialist Analysis
+            if parallel:
+                diagnostic_reply, specialist_reply = await asyncio.gather(
+                    run_diagnostic(),
+                    run_specialist("(diagnostic pending — generate an independent differential)")
+                )
+                results['diagnostic'], diagnostic_brief = brief(diagnostic_reply)
+            else:
+                results['diagnostic'], diagnostic_brief = brief(await run_diagnostic())
+                specialist_reply = await run_specialist(diagnostic_brief)
+            results['specialist'], specialist_brief = brief(specialist_reply)
             
             # Step 3: Coordinator Synthesis
             log("System", "🟢 Dr. Coordinator synthesizing findings...")
             log("Dr. Coordinator", "Creating unified care plan from all analyses...")
             
-            coordinator_prompt = f"""Synthesize the following analyses into a comprehensive, actionable care plan:
-
-**Original Medical Report:**
-{medical_report}
-
-**Diagnostic Analysis (Dr. Diagnostic):**
-{results['diagnostic']}
-
-**Specialist Consultation (Dr. Specialist):**
-{results['specialist']}
-
-Create a unified assessment that includes:
-
-1. **Summary Assessment**: Brief overview of the patient's condition
-2. **Priority Action Items**: Immediate steps needed (with urgency levels)
-3. **Recommended Care Plan**: Short-term and long-term management
-4. **Follow-up Requirements**: When and what type of follow-ups needed
-5. **Patient-Friendly Explanation**: Simple language summary for patient understanding
-
-Ensure all critical points from both agents are included and nothing is missed."""
+            coordinator_prompt = _COORDINATOR_PROMPT.substitute(
+                report_block=report_block, diagnostic=diagnostic_brief, specialist=specialist_brief
+            )
             
-            coordinator_response = self.coordinator_agent.run(coordinator_prompt)
-            results['coordinator'] = coordinator_response.content
+            results['coordinator'] = await self._run_agent(
+                self.coordinator_agent, coordinator_prompt, tokens_for('coordinator')
+            )
             log("Dr. Coordinator", "✅ Synthesis and care plan complete")
             
             log("System", "🎉 Multi-agent analysis successfully completed!")
             
+            if cache is not None:
+                cache.set(cache_key, results, expire=RESULT_CACHE_TTL)
+            
         except Exception as e:
+            if warmup is not None:
+                warmup.cancel()
             log("System", f"❌ Error during analysis: {str(e)}")
             raise
         
         return results
     
+    async def analyze_reports_batch(self, reports, max_inflight=8, log_callback=None, labels=None):
+        """
+        Analyze several medical reports concurrently, yielding each result as it finishes
+        
+        Args:
+            reports (list): Medical report texts to analyze
+            max_inflight (int): Maximum number of reports analyzed at the same time
+            log_callback (callable): Optional callback function for logging (agent_name, event)
+            labels (list): Optional names for the reports (e.g. file names) used to tag each
+                log event; defaults to "#1", "#2", ...
+        
+        Yields:
+            tuple: (index, results) in completion order; results holds an 'error' key
+                if that report's analysis failed
+        """
+        semaphore = asyncio.Semaphore(max_inflight)
+        
+        def tagged_log(index):
+            # Analyses interleave in one log, so say which report each event is about
+            if log_callback is None:
+                return None
+            label = labels[index] if labels else f"#{index + 1}"
+            return lambda agent_name, event: log_callback(agent_name, f"[{label}] {event}")
+        
+        async def analyze_one(index, report):
+            async with semaphore:
+                try:
+                    return index, await self.analyze_report(report, tagged_log(index))
+                except Exception as e:
+                    return index, {"error": str(e)}
+        
+        pending = [analyze_one(i, report) for i, report in enumerate(reports)]
+        for next_done in asyncio.as_completed(pending):
+            yield await next_done
+    
     def get_agent_info(self):
         """Returns information about all agents in the system"""
         return {
@@ -225,7 +530,7 @@ Labs: Troponin pending"""
         print(f"[{agent}] {event}")
     
     print("Testing agent system...")
-    results = system.analyze_report(test_report, test_logger)
+    results = asyncio.run(system.analyze_report(test_report, test_logger))
     print("\n=== Results ===")
     print(f"Diagnostic: {len(results['diagnostic'])} chars")
     print(f"Specialist: {len(results['specialist'])} chars")
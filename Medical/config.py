@@ -0,0 +1,32 @@
+"""
+Configuration settings for the Multi-Agent Medical Analyzer.
+"""
+import os
+
+# LLM Settings
+GROQ_MODEL_ID = "llama-3.1-8b-instant"
+GROQ_TIMEOUT = 60  # seconds
+GROQ_MAX_CONNECTIONS = 64
+
+# Bump whenever prompts, instructions or result parsing change in a way that
+# should invalidate cached analyses
+PROMPT_VERSION = 1
+
+# Result Cache Settings
+# Cached analyses contain patient report content: keep them next to the app
+# (not wherever it was launched from) and let them expire
+RESULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".medcache")
+RESULT_CACHE_TTL = 86400  # seconds
+
+# Report Truncation Settings
+# Long reports (e.g. multi-page OCR scans) are cut to their head and tail so
+# every prompt fits comfortably in the model's context and prefill stays fast
+REPORT_TOKEN_BUDGET = 3000
+REPORT_HEAD_TOKENS = 1500
+REPORT_TAIL_TOKENS = 1000
+CHARS_PER_TOKEN = 4  # rough estimate used when tiktoken is unavailable
+
+# Opt-in: while the first two agents run, send a 1-token coordinator request
+# with the same instructions + report prefix so the provider's prompt cache is
+# warm for the real call. Costs one extra (tiny) request per analysis.
+PREFETCH_COORDINATOR_PREFIX = False
@@ -1,10 +1,15 @@
 import streamlit as st
+import asyncio
+from collections import deque
+import concurrent.futures
 from datetime import datetime
 import os
 from pathlib import Path
 from PIL import Image
 import io
 import re
+import threading
+from queue import Queue, Empty
 
 # Install required packages:
 # pip install streamlit agno groq python-dotenv pytesseract pillow
@@ -20,24 +25,35 @@ except Exception as e:
     st.text(traceback.format_exc())
     st.stop()
 
-# Load environment variables
-load_dotenv()
+# Optional: OpenCV/NumPy speed up OCR by cleaning and shrinking scans first
+try:
+    import cv2
+    import numpy as np
+except ImportError:
+    cv2 = None
 
-# Page config
-st.set_page_config(page_title="Multi-Agent Medical Analyzer", page_icon="🏥", layout="wide")
+OCR_MAX_EDGE = 2500  # px; longer edges are downsampled before OCR
+# LSTM engine only, and treat the page as a single block of text
+TESSERACT_CONFIG = "--oem 1 --psm 6"
+MAX_LOG_ENTRIES = 200  # activity log keeps only the most recent entries
 
-# Custom CSS
-st.markdown("""
+_TRAILING_SPACE = re.compile(r'[ \t]+\n')
+_BLANK_LINES = re.compile(r'\n{3,}')
+
+# Custom CSS. Streamlit drops anything a rerun does not re-emit, so this is
+# still written on every run; only the string itself is built once.
+_CSS = """
 <style>
-    .agent-card {
+    /* Agent cards are keyed st.containers; Streamlit adds the class st-key-<key> */
+    [class*="st-key-agent-card-"] {
         padding: 20px;
         border-radius: 10px;
         margin: 10px 0;
         border-left: 4px solid;
     }
-    .diagnostic { border-left-color: #FF6B6B; background-color: #FFF5F5; }
-    .specialist { border-left-color: #4ECDC4; background-color: #F0FFFE; }
-    .coordinator { border-left-color: #95E1D3; background-color: #F5FFFD; }
+    .st-key-agent-card-diagnostic { border-left-color: #FF6B6B; background-color: #FFF5F5; }
+    .st-key-agent-card-specialist { border-left-color: #4ECDC4; background-color: #F0FFFE; }
+    .st-key-agent-card-coordinator { border-left-color: #95E1D3; background-color: #F5FFFD; }
     .log-entry { 
         font-size: 12px; 
         color: #666; 
@@ -53,15 +69,171 @@ st.markdown("""
         padding: 10px 20px;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+# Example cases offered under "Load Sample"
+SAMPLE_REPORTS = {
+    "Chest Pain Emergency": """Patient: 58-year-old male
+Chief Complaint: Chest pain, shortness of breath
+History: Pain started 2 hours ago, radiating to left arm
+Vitals: BP 150/95, HR 98, Temp 98.6°F, O2 Sat 94%
+Physical: Diaphoresis noted, mild distress
+Labs: Pending troponin, ECG shows ST elevation in leads II, III, aVF
+Past Medical History: Hypertension, hyperlipidemia
+Medications: Lisinopril 10mg, Atorvastatin 40mg""",
+    
+    "Diabetic Follow-up": """Patient: 45-year-old female with Type 2 DM
+Chief Complaint: Routine follow-up, foot tingling
+History: DM for 8 years, inconsistent medication adherence
+Vitals: BP 140/88, HR 76, BMI 32, Weight 185 lbs
+Labs: HbA1c 9.2%, fasting glucose 220 mg/dL, Creatinine 1.1
+Physical: Decreased sensation in bilateral feet, no wounds noted
+Current medications: Metformin 1000mg BID
+Allergies: None known""",
+    
+    "Respiratory Infection": """Patient: 32-year-old female
+Chief Complaint: Persistent cough, fever for 5 days
+History: Productive cough with yellow sputum, chills, body aches
+Vitals: BP 118/76, HR 88, Temp 101.4°F, RR 20, O2 Sat 96%
+Physical: Rhonchi bilateral lower lobes, no wheezing
+Labs: WBC 14,500, CRP elevated
+CXR: Patchy infiltrates right lower lobe
+Social: Non-smoker, works in daycare"""
+}
+
+# Load environment variables
+load_dotenv()
+
+# Page config
+st.set_page_config(page_title="Multi-Agent Medical Analyzer", page_icon="🏥", layout="wide")
+
+# Custom CSS
+st.markdown(_CSS, unsafe_allow_html=True)
+
+@st.cache_resource(show_spinner=False)
+def get_agent_system(api_key):
+    """Build the agent system once per API key and reuse it across reruns.
+
+    Runs on the script thread, so one-time setup such as loading the
+    tokenizer happens here rather than on the shared event loop.
+    """
+    return MedicalAgentSystem(api_key)
+
+@st.cache_resource(show_spinner=False)
+def get_event_loop():
+    """One long-lived event loop on a daemon thread.
+
+    The cached Groq models keep pooled async connections bound to the loop
+    that opened them, so analyses run here instead of a fresh asyncio.run().
+    """
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
+
+def run_async(coro, on_tick=None, interval=0.1):
+    """Run a coroutine on the shared event loop and wait for its result.
+
+    If on_tick is given it is called here, on the script thread, every
+    interval seconds while the coroutine runs (e.g. to redraw streamed text).
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, get_event_loop())
+    if on_tick is None:
+        return future.result()
+    while True:
+        try:
+            return future.result(timeout=interval)
+        except concurrent.futures.TimeoutError:
+            on_tick()
+
+def run_async_stream(agen, on_item):
+    """Drain an async generator on the shared event loop, calling on_item here as items arrive"""
+    items = Queue()
+    
+    async def drain():
+        async for item in agen:
+            items.put(item)
+    
+    future = asyncio.run_coroutine_threadsafe(drain(), get_event_loop())
+    while True:
+        try:
+            on_item(items.get(timeout=0.1))
+        except Empty:
+            if future.done():
+                future.result()  # re-raise any failure from the loop
+                while not items.empty():
+                    on_item(items.get_nowait())
+                break
 
 # Initialize session state
 if 'analysis_log' not in st.session_state:
-    st.session_state.analysis_log = []
+    st.session_state.analysis_log = deque(maxlen=MAX_LOG_ENTRIES)
 if 'analysis_results' not in st.session_state:
     st.session_state.analysis_results = None
 if 'extracted_text' not in st.session_state:
     st.session_state.extracted_text = ""
+if 'batch_results' not in st.session_state:
+    st.session_state.batch_results = None
+
+def _preprocess(image):
+    """Grayscale, downsample, binarize and deskew a scan for faster, cleaner OCR.
+
+    Returns the original image if OpenCV is not installed or any step fails.
+    """
+    if cv2 is None:
+        return image
+    try:
+        arr = np.asarray(image.convert("L"))
+        
+        # Downsample first so every later step touches fewer pixels
+        height, width = arr.shape
+        scale = OCR_MAX_EDGE / max(height, width)
+        if scale < 1:
+            arr = cv2.resize(arr, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+        
+        arr = cv2.adaptiveThreshold(arr, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 10)
+        
+        # Estimate skew from the bounding box of the dark (text) pixels
+        ys, xs = np.nonzero(arr == 0)
+        if len(xs):
+            angle = cv2.minAreaRect(np.column_stack((xs, ys)).astype(np.float32))[-1]
+            if angle > 45:
+                angle -= 90
+            elif angle < -45:
+                angle += 90
+            # Only straighten real skew; tiny angles are noise, large ones are
+            # more likely a rotated page than a crooked scan
+            if 0.5 <= abs(angle) <= 15:
+                height, width = arr.shape
+                matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+                arr = cv2.warpAffine(arr, matrix, (width, height), flags=cv2.INTER_LINEAR,
+                                     borderMode=cv2.BORDER_CONSTANT, borderValue=255)
+        
+        return Image.fromarray(arr)
+    except Exception:
+        return image
+
+@st.cache_resource(show_spinner=False)
+def _tesseract_version():
+    """Probe the Tesseract binary once per process instead of on every OCR call.
+
+    Raises if it is missing; Streamlit does not cache exceptions, so only a
+    successful probe sticks and a later install or PATH fix is picked up.
+    """
+    return pytesseract.get_tesseract_version()
+
+def _tesseract_available():
+    """True if the Tesseract binary can be run"""
+    try:
+        _tesseract_version()
+        return True
+    except Exception:
+        return False
+
+@st.cache_resource(show_spinner="Loading fallback OCR model...")
+def _get_easyocr_reader():
+    """Load the easyocr detection/recognition weights once and reuse them across runs"""
+    import easyocr
+    return easyocr.Reader(['en'], gpu=False)
 
 def perform_ocr(image):
     """Extract text from image using available OCR engine.
@@ -71,19 +243,15 @@ def perform_ocr(image):
     returns an empty string and shows instructions to the user.
     """
     # Try pytesseract (requires Tesseract OCR binary installed)
-    try:
-        import pytesseract
+    if _tesseract_available():
         try:
-            text = pytesseract.image_to_string(image)
+            text = pytesseract.image_to_string(_preprocess(image), config=TESSERACT_CONFIG)
             return text.strip()
-        except pytesseract.pytesseract.TesseractNotFoundError:
-            # Tesseract binary not installed or not in PATH
-            st.warning("Tesseract executable not found. Trying fallback OCR...")
         except Exception as e:
             st.warning(f"pytesseract OCR failed: {e}. Trying fallback OCR...")
-    except Exception:
-        # pytesseract not installed at all
-        st.info("`pytesseract` Python package not available. Trying fallback OCR...")
+    else:
+        # Tesseract binary not installed or not in PATH
+        st.warning("Tesseract executable not found. Trying fallback OCR...")
 
     # Fallback: try easyocr (pure-Python model; may require additional packages)
     try:
@@ -105,7 +273,7 @@ def perform_ocr(image):
             st.error("`numpy` is required by easyocr. Install with `pip install numpy`.")
             return ""
 
-        reader = easyocr.Reader(['en'], gpu=False)
+        reader = _get_easyocr_reader()
         img_arr = np.array(image.convert('RGB'))
         results = reader.readtext(img_arr)
         # results: list of (bbox, text, confidence)
@@ -117,6 +285,27 @@ def perform_ocr(image):
         st.error(f"Fallback OCR (easyocr) error: {e}")
         return ""
 
+def _sanitize_report(text: str) -> str:
+    """Prepare a report for download: remove markdown bold markers and tidy blank lines"""
+    if not isinstance(text, str):
+        return text
+    # A few whole-buffer passes instead of splitting, trimming and re-joining every line
+    text = text.replace('**', '').replace('\r\n', '\n')
+    # Trim trailing whitespace on each line, then collapse 3+ newlines into 2
+    text = _TRAILING_SPACE.sub('\n', text)
+    text = _BLANK_LINES.sub('\n\n', text)
+    return text.strip() + '\n'
+
+def render_agent_card(css_class, title, content):
+    """Render one agent's reply inside its styled card.
+
+    The card is a keyed container styled by _CSS, and the heading and reply
+    go out as one plain markdown element, so model output (including code
+    and comparisons like x < 5) renders as markdown and never as raw HTML.
+    """
+    with st.container(key=f"agent-card-{css_class}"):
+        st.markdown(f"### {title}\n\n{content}")
+
 # UI Layout
 st.title("🏥 Multi-Agent Medical Report Analyzer")
 st.markdown("**AI-powered collaborative analysis by multiple specialized medical agents**")
@@ -142,8 +331,9 @@ with st.sidebar:
     
     if st.button("🗑️ Clear Results"):
         st.session_state.analysis_results = None
-        st.session_state.analysis_log = []
+        st.session_state.analysis_log = deque(maxlen=MAX_LOG_ENTRIES)
         st.session_state.extracted_text = ""
+        st.session_state.batch_results = None
         st.rerun()
     
     st.caption("⚠️ Disclaimer: This is a demo tool. Always consult real healthcare professionals.")
@@ -153,11 +343,12 @@ st.header("📥 Input Medical Report")
 
 input_method = st.radio(
     "Choose input method:",
-    ["✍️ Type/Paste Text", "📸 Upload Image (OCR)", "📋 Load Sample"],
+    ["✍️ Type/Paste Text", "📸 Upload Image (OCR)", "📋 Load Sample", "🗂️ Batch Upload"],
     horizontal=True
 )
 
 medical_report = ""
+batch_files = []
 
 if input_method == "✍️ Type/Paste Text":
     medical_report = st.text_area(
@@ -200,42 +391,23 @@ elif input_method == "📸 Upload Image (OCR)":
                 st.info("Click 'Extract Text' to process the image")
 
 elif input_method == "📋 Load Sample":
-    sample_reports = {
-        "Chest Pain Emergency": """Patient: 58-year-old male
-Chief Complaint: Chest pain, shortness of breath
-History: Pain started 2 hours ago, radiating to left arm
-Vitals: BP 150/95, HR 98, Temp 98.6°F, O2 Sat 94%
-Physical: Diaphoresis noted, mild distress
-Labs: Pending troponin, ECG shows ST elevation in leads II, III, aVF
-Past Medical History: Hypertension, hyperlipidemia
-Medications: Lisinopril 10mg, Atorvastatin 40mg""",
-        
-        "Diabetic Follow-up": """Patient: 45-year-old female with Type 2 DM
-Chief Complaint: Routine follow-up, foot tingling
-History: DM for 8 years, inconsistent medication adherence
-Vitals: BP 140/88, HR 76, BMI 32, Weight 185 lbs
-Labs: HbA1c 9.2%, fasting glucose 220 mg/dL, Creatinine 1.1
-Physical: Decreased sensation in bilateral feet, no wounds noted
-Current medications: Metformin 1000mg BID
-Allergies: None known""",
-        
-        "Respiratory Infection": """Patient: 32-year-old female
-Chief Complaint: Persistent cough, fever for 5 days
-History: Productive cough with yellow sputum, chills, body aches
-Vitals: BP 118/76, HR 88, Temp 101.4°F, RR 20, O2 Sat 96%
-Physical: Rhonchi bilateral lower lobes, no wheezing
-Labs: WBC 14,500, CRP elevated
-CXR: Patchy infiltrates right lower lobe
-Social: Non-smoker, works in daycare"""
-    }
-    
-    selected_sample = st.selectbox("Select a sample case:", list(sample_reports.keys()))
+    selected_sample = st.selectbox("Select a sample case:", list(SAMPLE_REPORTS.keys()))
     medical_report = st.text_area(
         "Medical report:",
-        value=sample_reports[selected_sample],
+        value=SAMPLE_REPORTS[selected_sample],
         height=200
     )
 
+elif input_method == "🗂️ Batch Upload":
+    st.info("📌 Upload several reports (images or .txt files). They are analyzed concurrently.")
+    
+    batch_files = st.file_uploader(
+        "Choose report files",
+        type=['png', 'jpg', 'jpeg', 'tiff', 'bmp', 'txt'],
+        accept_multiple_files=True,
+        help="Images are read with OCR; text files are used as-is"
+    ) or []
+
 # Analyze button
 st.markdown("---")
 analyze_btn = st.button("🔍 Analyze with Multi-Agent System", type="primary", width='stretch')
@@ -245,9 +417,11 @@ with st.expander("📊 Real-time Activity Log", expanded=True):
     log_container = st.container(height=200)
     
     if st.session_state.analysis_log:
-        with log_container:
-            for log in st.session_state.analysis_log:
-                st.markdown(f'<div class="log-entry">{log}</div>', unsafe_allow_html=True)
+        # One element for the whole log rather than one per entry
+        log_container.markdown(
+            "\n".join(f'<div class="log-entry">{log}</div>' for log in st.session_state.analysis_log),
+            unsafe_allow_html=True
+        )
     else:
         st.info("Activity log will appear here during analysis...")
 
@@ -255,23 +429,100 @@ with st.expander("📊 Real-time Activity Log", expanded=True):
 if analyze_btn:
     if not api_key:
         st.error("⚠️ Please provide a Groq API key in .env file or sidebar")
+    elif input_method == "🗂️ Batch Upload":
+        if not batch_files:
+            st.error("⚠️ Please upload at least one report to analyze")
+        else:
+            st.session_state.analysis_log = deque(maxlen=MAX_LOG_ENTRIES)  # Clear previous logs
+            st.session_state.analysis_results = None  # a batch replaces any single result
+            analysis_log = st.session_state.analysis_log
+            
+            def log_callback(agent_name, event):
+                timestamp = datetime.now().strftime("%H:%M:%S")
+                analysis_log.append(f"[{timestamp}] <strong>{agent_name}</strong>: {event}")
+            
+            with st.spinner("Reading uploaded reports..."):
+                names, reports = [], []
+                for f in batch_files:
+                    if f.name.lower().endswith('.txt'):
+                        text = f.getvalue().decode('utf-8', errors='replace').strip()
+                    else:
+                        text = perform_ocr(Image.open(f))
+                    if text:
+                        names.append(f.name)
+                        reports.append(text)
+            
+            if not reports:
+                st.error("⚠️ No text could be read from the uploaded files")
+            else:
+                batch_results = [None] * len(reports)
+                progress = st.progress(0.0, text=f"Analyzing {len(reports)} reports...")
+                
+                def on_result(item):
+                    index, results = item
+                    batch_results[index] = (names[index], results)
+                    done = sum(r is not None for r in batch_results)
+                    progress.progress(done / len(reports), text=f"Analyzed {done}/{len(reports)}: {names[index]}")
+                
+                try:
+                    agent_system = get_agent_system(api_key)
+                    run_async_stream(
+                        agent_system.analyze_reports_batch(reports, log_callback=log_callback, labels=names),
+                        on_result
+                    )
+                    st.session_state.batch_results = batch_results
+                    st.success(f"✅ Batch analysis complete ({len(reports)} reports)")
+                except Exception as e:
+                    st.error(f"❌ Error: {str(e)}")
     elif not medical_report.strip():
         st.error("⚠️ Please enter a medical report to analyze")
     else:
-        st.session_state.analysis_log = []  # Clear previous logs
+        st.session_state.analysis_log = deque(maxlen=MAX_LOG_ENTRIES)  # Clear previous logs
+        st.session_state.batch_results = None  # a single analysis replaces any batch
+        
+        # Live view of the three agents' replies while they stream in
+        live_view = st.empty()
+        with live_view.container():
+            live_tabs = st.tabs(["🔴 Diagnostic Agent", "🔵 Specialist Agent", "🟢 Coordinator Agent"])
+            placeholders = {}
+            for key, tab in zip(('diagnostic', 'specialist', 'coordinator'), live_tabs):
+                with tab:
+                    placeholders[key] = st.empty()
+                    placeholders[key].caption("Waiting for this agent...")
         
         with st.spinner("🤖 Multi-agent analysis in progress..."):
             try:
-                # Initialize agent system
-                agent_system = MedicalAgentSystem(api_key)
+                # Reuse the cached agent system for this key
+                agent_system = get_agent_system(api_key)
+                
+                # Run analysis with logging callback. It runs on the event loop
+                # thread, so it appends to the list rather than touching session state.
+                analysis_log = st.session_state.analysis_log
                 
-                # Run analysis with logging callback
                 def log_callback(agent_name, event):
                     timestamp = datetime.now().strftime("%H:%M:%S")
                     log_entry = f"[{timestamp}] <strong>{agent_name}</strong>: {event}"
-                    st.session_state.analysis_log.append(log_entry)
+                    analysis_log.append(log_entry)
+                
+                # Agents stream on the event loop thread and only record the
+                # latest text per agent; this thread redraws whatever changed.
+                streamed = {}
+                drawn = {}
                 
-                results = agent_system.analyze_report(medical_report, log_callback)
+                def token_callback(agent_key, text):
+                    streamed[agent_key] = text
+                
+                def redraw():
+                    for key, text in list(streamed.items()):
+                        if drawn.get(key) is not text:
+                            placeholders[key].markdown(text)
+                            drawn[key] = text
+                
+                results = run_async(
+                    agent_system.analyze_report(medical_report, log_callback, token_callback=token_callback),
+                    on_tick=redraw
+                )
+                live_view.empty()
                 st.session_state.analysis_results = results
                 
                 st.success("✅ Analysis complete!")
@@ -297,22 +548,13 @@ if st.session_state.analysis_results:
     ])
     
     with tab1:
-        st.markdown('<div class="agent-card diagnostic">', unsafe_allow_html=True)
-        st.markdown("### Dr. Diagnostic - Primary Analysis")
-        st.markdown(st.session_state.analysis_results['diagnostic'])
-        st.markdown('</div>', unsafe_allow_html=True)
+        render_agent_card("diagnostic", "Dr. Diagnostic - Primary Analysis", st.session_state.analysis_results['diagnostic'])
     
     with tab2:
-        st.markdown('<div class="agent-card specialist">', unsafe_allow_html=True)
-        st.markdown("### Dr. Specialist - Expert Consultation")
-        st.markdown(st.session_state.analysis_results['specialist'])
-        st.markdown('</div>', unsafe_allow_html=True)
+        render_agent_card("specialist", "Dr. Specialist - Expert Consultation", st.session_state.analysis_results['specialist'])
     
     with tab3:
-        st.markdown('<div class="agent-card coordinator">', unsafe_allow_html=True)
-        st.markdown("### Dr. Coordinator - Unified Care Plan")
-        st.markdown(st.session_state.analysis_results['coordinator'])
-        st.markdown('</div>', unsafe_allow_html=True)
+        render_agent_card("coordinator", "Dr. Coordinator - Unified Care Plan", st.session_state.analysis_results['coordinator'])
     
     with tab4:
         st.markdown("### Complete Multi-Agent Report")
@@ -344,19 +586,6 @@ COORDINATOR SYNTHESIS (Dr. Coordinator)
 END OF REPORT
 {'='*70}
 """
-        # Sanitize report for download: remove markdown bold markers and tidy blank lines
-        def _sanitize_report(text: str) -> str:
-            if not isinstance(text, str):
-                return text
-            # Remove markdown bold markers
-            text = text.replace('**', '')
-            # Collapse 3+ newlines into 2
-            text = re.sub(r'\n{3,}', '\n\n', text)
-            # Trim trailing whitespace on each line
-            text = '\n'.join(line.rstrip() for line in text.splitlines())
-            # Trim leading/trailing whitespace
-            return text.strip() + '\n'
-
         report_text_clean = _sanitize_report(report_text)
 
         st.text_area("Full Report Preview", report_text_clean, height=400)
@@ -369,3 +598,20 @@ END OF REPORT
             key="download_clean_report",
             width='stretch'
         )
+
+# Display batch results
+if st.session_state.batch_results:
+    st.markdown("---")
+    st.header("🗂️ Batch Analysis Results")
+    
+    for name, results in st.session_state.batch_results:
+        with st.expander(f"📄 {name}"):
+            if 'error' in results:
+                st.error(f"❌ Error: {results['error']}")
+                continue
+            st.markdown("### 🔴 Dr. Diagnostic - Primary Analysis")
+            st.markdown(results['diagnostic'])
+            st.markdown("### 🔵 Dr. Specialist - Expert Consultation")
+            st.markdown(results['specialist'])
+            st.markdown("### 🟢 Dr. Coordinator - Unified Care Plan")
+            st.markdown(results['coordinator'])